@@ -1,8 +1,226 @@
 import re
+import sys
 import json
+from time import time_ns
 from datetime import datetime
-from typing import List, Dict, Tuple
-from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from array import array
+from functools import lru_cache
+
+# Precompiled patterns shared by every conversation turn
+_WORD_RE = re.compile(r"\b\w+\b")
+# Emergency indicators fused into one alternation: distress words, death
+# words, inability words, or multiple exclamation marks
+_EMERGENCY_RE = re.compile(
+    r"\b(?:emergency|urgent|help|sos|crisis|critical|mayday|911"
+    r"|dying|dead|death"
+    r"|can'?t|cannot|unable|won'?t|failing)\b"
+    r"|!{2,}",
+    re.IGNORECASE,
+)
+_GREETING_RE = re.compile(r"\b(hi|hello|hey|greetings|sup)\b")
+_FAREWELL_RE = re.compile(r"\b(bye|goodbye|see you|exit|quit)\b")
+_STATUS_RE = re.compile(r"\b(status|report)\b")
+_THANKS_RE = re.compile(r"\b(thank|thanks)\b")
+_NAME_RES = [
+    re.compile(r"(?:name is|i'm|im|i am|call me)\s+(\w+)"),
+    re.compile(r"^(\w+)\s+(?:here|reporting)"),
+    re.compile(r"this is\s+(\w+)"),
+]
+
+# Most recent conversation turns kept in memory
+HISTORY_LIMIT = 200
+
+# Fields every custom dataset entry must provide
+REQUIRED_ENTRY_KEYS = frozenset({"keywords", "response", "severity", "category"})
+
+# Layer 7 help banner, shown when nothing in the message can be matched
+FALLBACK_HELP = """🤔 I want to help but need more details.
+
+I'm trained on:
+
+🚨 EMERGENCIES:
+• Oxygen/air problems
+• Fire
+• Hull breach/pressure loss
+• Radiation exposure
+• Medical injuries
+
+⚙️ SYSTEMS:
+• Power/electrical
+• Communication
+• Navigation
+• Life support
+
+🌌 INFORMATION:
+• Planets & space facts
+• Mission data
+
+🧠 SUPPORT:
+• Stress & anxiety help
+
+What do you need help with?"""
+
+# Shown when an emergency is detected but its type is unclear
+GENERAL_EMERGENCY_RESPONSE = """🚨 EMERGENCY PROTOCOL ACTIVATED
+
+I detect an emergency but need to know the type. Please specify:
+
+1. 💨 OXYGEN/AIR - Leak, low O2, can't breathe
+2. 🔥 FIRE - Flames, smoke, burning
+3. 🕳️ HULL BREACH - Hole, depressurization, pressure loss
+4. ☢️ RADIATION - Solar flare, high dosimeter reading
+5. ⚡ POWER FAILURE - Electrical issues, battery dead
+6. 📡 COMMUNICATION LOSS - Can't reach Earth
+7. 🏥 MEDICAL - Injury, illness, unconscious crew
+8. 🧭 NAVIGATION - Lost, off course
+9. 🌬️ LIFE SUPPORT - CO2 high, temperature issues
+
+Type the NUMBER or NAME of your emergency for immediate protocol!"""
+
+# Interactive chat banner, written in one go ({agent}, {protocols} filled in)
+CHAT_BANNER = (
+    "\n".join(
+        [
+            "=" * 80,
+            "🚀 SOS: SPACE AGENT - INTELLIGENT MISSION SUPPORT 🚀".center(80),
+            "=" * 80,
+            "\n{agent}: AI systems online...",
+            "{agent}: {protocols} emergency protocols loaded",
+            "{agent}: Multi-layer intelligence active 🧠",
+            "{agent}: Mission Control link established 🛰️\n",
+            "=" * 80,
+            "\n💡 INTELLIGENCE FEATURES:",
+            "   ✓ Understands natural language (not just exact keywords)",
+            "   ✓ Detects emergencies automatically",
+            "   ✓ Asks clarifying questions when needed",
+            "   ✓ Remembers conversation context",
+            "   ✓ Fuzzy keyword matching",
+            "\n📝 COMMANDS:",
+            "   • 'export' - Save conversation",
+            "   • 'template' - Get dataset format",
+            "   • 'quit' - Exit",
+            "\n💬 TRY SAYING:",
+            '   • "Emergency! We\'re losing air!"',
+            '   • "Something\'s burning"',
+            '   • "I can\'t reach Earth"',
+            '   • "Tell me about Mars"',
+            '   • "I\'m feeling anxious"',
+            "\n" + "=" * 80 + "\n",
+        ]
+    )
+    + "\n"
+)
+
+# Keywords hinting at each emergency type when the exact protocol is unclear
+EMERGENCY_TYPES = {
+    "oxygen/breathing": ["oxygen", "o2", "air", "breath", "suffocate", "atmosphere"],
+    "fire": ["fire", "flame", "smoke", "burning", "burn"],
+    "hull breach": ["breach", "hole", "pressure", "depressurization", "vacuum"],
+    "radiation": ["radiation", "solar", "flare", "dosimeter"],
+    "power": ["power", "electrical", "battery", "energy"],
+    "communication": ["comms", "communication", "radio", "signal", "antenna"],
+    "medical": ["injured", "hurt", "sick", "pain", "bleeding", "unconscious"],
+    "navigation": ["lost", "navigation", "position", "course"],
+    "life support": ["life support", "co2", "temperature", "hot", "cold"],
+}
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed keyword set
+    - Built once, then scans any text in a single pass
+    - Reports the value stored for every keyword occurring in the text
+    """
+
+    __slots__ = ("goto", "fail", "output")
+
+    def __init__(self) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Any]] = [[]]
+
+    def add_word(self, keyword: str, value: Any = None) -> None:
+        """Add a keyword to the trie (call make_automaton afterwards)"""
+        if value is None:
+            value = keyword
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        if value not in self.output[state]:
+            self.output[state].append(value)
+
+    def make_automaton(self) -> None:
+        """Compute failure links breadth-first"""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = (
+                    self.output[next_state] + self.output[self.fail[next_state]]
+                )
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """Yield (end_index, value) for every keyword found in text"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for value in output[state]:
+                yield end, value
+
+
+def build_emergency_type_automaton() -> KeywordAutomaton:
+    """Compile EMERGENCY_TYPES into one automaton reporting the type"""
+    automaton = KeywordAutomaton()
+    for emergency_type, keywords in EMERGENCY_TYPES.items():
+        for keyword in keywords:
+            automaton.add_word(keyword, emergency_type)
+    automaton.make_automaton()
+    return automaton
+
+
+# Shared by every chatbot instance; the type table never changes
+EMERGENCY_TYPE_AUTOMATON = build_emergency_type_automaton()
+
+
+def is_valid_entry(entry: Any) -> bool:
+    """Check a custom entry has every field the dataset columns rely on"""
+    return (
+        isinstance(entry, dict)
+        and REQUIRED_ENTRY_KEYS <= entry.keys()
+        and isinstance(entry["category"], str)
+        and isinstance(entry["response"], str)
+        and isinstance(entry["keywords"], list)
+        and all(isinstance(keyword, str) for keyword in entry["keywords"])
+    )
+
+
+def datetime_from_ns(timestamp_ns: int) -> datetime:
+    """Convert a time_ns() reading to a local datetime, exact to the microsecond"""
+    seconds, nanoseconds = divmod(timestamp_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=nanoseconds // 1000)
+
+
+@lru_cache(maxsize=1024)
+def normalize_message(message: str) -> Tuple[str, Tuple[str, ...]]:
+    """Lowercase and tokenize a message (cached, repeated turns are common)"""
+    message_lower = message.lower()
+    return message_lower, tuple(_WORD_RE.findall(message_lower))
 
 
 class SmartSpaceAgentChatbot:
@@ -15,15 +233,50 @@ class SmartSpaceAgentChatbot:
     - Fallback mechanisms
     """
 
-    def __init__(self, dataset_path: str = None):
+    __slots__ = (
+        # Agent and conversation state
+        "agent_name",
+        "mission_status",
+        "user_name",
+        "stress_level",
+        "last_topic",
+        "awaiting_clarification",
+        "clarification_option_ids",
+        "_hist_roles",
+        "_hist_msgs",
+        "_hist_ts",
+        # Dataset and its per-field columns
+        "dataset",
+        "categories",
+        "categories_lower",
+        "category_names",
+        "category_display",
+        "responses",
+        "keywords_per_entry",
+        "questions",
+        # Keyword matching indexes and caches
+        "keyword_index",
+        "keyword_automaton",
+        "_long_keywords",
+        "_trigram_index",
+        "_entries_by_emergency_type",
+        "_cached_keyword_match",
+        "_cached_word_hits",
+    )
+
+    def __init__(self, dataset_path: Optional[str] = None) -> None:
         self.agent_name = "NOVA"
         self.mission_status = "ACTIVE"
-        self.conversation_history = []
-        self.user_name = None
+        # Conversation history as parallel role/message/timestamp_ns columns
+        self._hist_roles: List[str] = []
+        self._hist_msgs: List[str] = []
+        self._hist_ts = array("q")
+        self.user_name: Optional[str] = None
         self.stress_level = 0
-        self.last_topic = None
+        self.last_topic: Optional[str] = None
         self.awaiting_clarification = False
-        self.clarification_options = []
+        # Dataset indices offered in the pending clarification question
+        self.clarification_option_ids = array("I")
 
         # Load comprehensive dataset
         self.dataset = self.load_default_dataset()
@@ -701,17 +954,14 @@ What's specifically concerning you? Or want a distraction?""",
             },
         ]
 
-    def load_dataset(self, filepath: str):
+    def load_dataset(self, filepath: str) -> None:
         """Load custom dataset from JSON"""
         try:
             with open(filepath, "r", encoding="utf-8") as f:
                 custom_data = json.load(f)
 
             for entry in custom_data:
-                if all(
-                    key in entry
-                    for key in ["keywords", "response", "severity", "category"]
-                ):
+                if is_valid_entry(entry):
                     self.dataset.append(entry)
 
             print(f"✅ Loaded {len(custom_data)} custom entries")
@@ -722,168 +972,220 @@ What's specifically concerning you? Or want a distraction?""",
         except Exception as e:
             print(f"❌ Error: {str(e)}")
 
-    def build_keyword_index(self):
+    def build_dataset_columns(self) -> None:
+        """Flatten dataset entries into parallel per-field columns"""
+        # Categories repeat across entries; intern them
+        self.categories = [sys.intern(entry["category"]) for entry in self.dataset]
+        self.categories_lower = [
+            sys.intern(category.lower()) for category in self.categories
+        ]
+        self.category_names = [category.upper() for category in self.categories]
+        self.category_display = [name.replace("_", " ") for name in self.category_names]
+        self.responses = [entry["response"] for entry in self.dataset]
+        self.keywords_per_entry = [entry["keywords"] for entry in self.dataset]
+        self.questions = [entry.get("questions") or [] for entry in self.dataset]
+
+    def build_keyword_index(self) -> None:
         """Build inverted index for fast keyword lookup"""
-        self.keyword_index = {}
+        self.build_dataset_columns()
+        postings: Dict[str, List[int]] = {}
 
-        for idx, entry in enumerate(self.dataset):
-            for keyword in entry["keywords"]:
-                keyword_lower = keyword.lower()
-                if keyword_lower not in self.keyword_index:
-                    self.keyword_index[keyword_lower] = []
-                self.keyword_index[keyword_lower].append(idx)
+        for idx, keywords in enumerate(self.keywords_per_entry):
+            for keyword in keywords:
+                keyword_lower = sys.intern(keyword.lower())
+                if keyword_lower not in postings:
+                    postings[keyword_lower] = []
+                postings[keyword_lower].append(idx)
+
+        # Freeze postings into compact tuples once the index is complete
+        self.keyword_index: Dict[str, Tuple[int, ...]] = {
+            keyword: tuple(indices) for keyword, indices in postings.items()
+        }
+
+        # Only keywords of 4+ chars take part in partial matching. Each gets a
+        # profile built once: (keyword, indices, 4-gram set). A common
+        # substring of length 4+ exists iff two words share a 4-gram.
+        self._long_keywords = tuple(
+            (
+                keyword,
+                indices,
+                frozenset(keyword[i : i + 4] for i in range(len(keyword) - 3)),
+            )
+            for keyword, indices in self.keyword_index.items()
+            if len(keyword) >= 4
+        )
+
+        # Trigram -> long-keyword ids; any partial match shares a trigram
+        trigram_postings: Dict[str, List[int]] = {}
+        for keyword_id, (keyword, _, _) in enumerate(self._long_keywords):
+            for trigram in {keyword[i : i + 3] for i in range(len(keyword) - 2)}:
+                trigram_postings.setdefault(trigram, []).append(keyword_id)
+        self._trigram_index: Dict[str, Tuple[int, ...]] = {
+            trigram: tuple(ids) for trigram, ids in trigram_postings.items()
+        }
+
+        # Dataset entries related to each emergency type, for clarification
+        self._entries_by_emergency_type = {
+            et: [
+                idx
+                for idx, category_lower in enumerate(self.categories_lower)
+                if et in category_lower
+                or any(et in kw for kw in self.keywords_per_entry[idx])
+            ]
+            for et in EMERGENCY_TYPES
+        }
 
-    def fuzzy_keyword_match(self, user_input: str) -> List[Tuple[int, int]]:
+        # Repeated questions and words skip scoring; a rebuild starts fresh caches
+        self._cached_keyword_match = lru_cache(maxsize=512)(self._score_keyword_match)
+        self._cached_word_hits = lru_cache(maxsize=4096)(self._score_word)
+
+        # One automaton over every keyword for single-pass containment checks
+        self.keyword_automaton = KeywordAutomaton()
+        for keyword in self.keyword_index:
+            self.keyword_automaton.add_word(keyword)
+        self.keyword_automaton.make_automaton()
+
+    def fuzzy_keyword_match(self, user_words: Tuple[str, ...]) -> List[Tuple[int, int]]:
         """
-        Match user input against keywords with fuzzy matching
+        Match lowercased user words against keywords with fuzzy matching
         Returns list of (dataset_index, match_score) tuples
         """
-        user_words = re.findall(r"\b\w+\b", user_input.lower())
-        matches = Counter()
-
+        return list(self._cached_keyword_match(tuple(user_words)))
+
+    def _score_keyword_match(
+        self, user_words: Tuple[str, ...]
+    ) -> Tuple[Tuple[int, int], ...]:
+        """Uncached scoring behind fuzzy_keyword_match"""
+        # (dataset indices, weight) per keyword hit, summed at the end
+        hits: List[Tuple[Tuple[int, ...], int]] = []
         for word in user_words:
-            # Exact match
-            if word in self.keyword_index:
-                for idx in self.keyword_index[word]:
-                    matches[idx] += 10
-
-            # Partial match (word contains keyword or vice versa)
-            for keyword, indices in self.keyword_index.items():
-                if len(word) >= 4 and len(keyword) >= 4:
-                    if word in keyword or keyword in word:
-                        for idx in indices:
-                            matches[idx] += 5
-                    # Check for common substring
-                    elif self.longest_common_substring(word, keyword) >= 4:
-                        for idx in indices:
-                            matches[idx] += 3
-
-        # Return sorted by score
-        return [(idx, score) for idx, score in matches.most_common()]
-
-    def longest_common_substring(self, s1: str, s2: str) -> int:
-        """Find length of longest common substring"""
-        m, n = len(s1), len(s2)
-        max_len = 0
-
-        for i in range(m):
-            for j in range(n):
-                k = 0
-                while i + k < m and j + k < n and s1[i + k] == s2[j + k]:
-                    k += 1
-                max_len = max(max_len, k)
-
-        return max_len
-
-    def detect_emergency_intent(self, message: str) -> bool:
+            hits.extend(self._cached_word_hits(word))
+
+        # Accumulate into a flat score vector, remembering first-hit order
+        scores = [0] * len(self.dataset)
+        ranked = []
+        for indices, weight in hits:
+            for idx in indices:
+                if not scores[idx]:
+                    ranked.append(idx)
+                scores[idx] += weight
+
+        # Return sorted by score (stable, so ties keep first-hit order)
+        ranked.sort(key=scores.__getitem__, reverse=True)
+        return tuple((idx, scores[idx]) for idx in ranked)
+
+    def _score_word(self, word: str) -> Tuple[Tuple[Tuple[int, ...], int], ...]:
+        """Keyword hits for a single user word as (dataset indices, weight)"""
+        hits = []
+
+        # Exact match is a single hashed lookup
+        exact = self.keyword_index.get(word)
+        if exact is not None:
+            hits.append((exact, 10))
+
+        if len(word) < 4:
+            return tuple(hits)
+
+        # Every keyword contained in this word, found in one pass
+        contained = {kw for _, kw in self.keyword_automaton.iter(word)}
+
+        # Candidate keywords share at least one trigram with the word
+        candidates: Set[int] = set()
+        for i in range(len(word) - 2):
+            candidates.update(self._trigram_index.get(word[i : i + 3], ()))
+        fourgrams = {word[i : i + 4] for i in range(len(word) - 3)}
+
+        # Partial match (word contains keyword or vice versa)
+        for keyword_id in sorted(candidates):
+            keyword, indices, keyword_fourgrams = self._long_keywords[keyword_id]
+            if keyword in contained or word in keyword:
+                hits.append((indices, 5))
+            # Check for common substring
+            elif not fourgrams.isdisjoint(keyword_fourgrams):
+                hits.append((indices, 3))
+
+        return tuple(hits)
+
+    def detect_emergency_intent(self, message_lower: str) -> bool:
         """Detect if user is reporting an emergency"""
-        emergency_indicators = [
-            r"\b(emergency|urgent|help|sos|crisis|critical|mayday|911)\b",
-            r"\b(dying|dead|death)\b",
-            r"\b(can\'t|cannot|unable|won\'t|failing)\b",
-            r"!{2,}",  # Multiple exclamation marks
-        ]
-
-        for pattern in emergency_indicators:
-            if re.search(pattern, message.lower()):
-                return True
-        return False
+        return _EMERGENCY_RE.search(message_lower) is not None
 
-    def extract_emergency_type(self, message: str) -> str:
+    def extract_emergency_type(self, message_lower: str) -> List[str]:
         """Try to determine what type of emergency from context"""
-        categories = {
-            "oxygen/breathing": [
-                "oxygen",
-                "o2",
-                "air",
-                "breath",
-                "suffocate",
-                "atmosphere",
-            ],
-            "fire": ["fire", "flame", "smoke", "burning", "burn"],
-            "hull breach": ["breach", "hole", "pressure", "depressurization", "vacuum"],
-            "radiation": ["radiation", "solar", "flare", "dosimeter"],
-            "power": ["power", "electrical", "battery", "energy"],
-            "communication": ["comms", "communication", "radio", "signal", "antenna"],
-            "medical": ["injured", "hurt", "sick", "pain", "bleeding", "unconscious"],
-            "navigation": ["lost", "navigation", "position", "course"],
-            "life support": ["life support", "co2", "temperature", "hot", "cold"],
-        }
-
-        message_lower = message.lower()
-        detected = []
-
-        for category, keywords in categories.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    detected.append(category)
-                    break
-
-        return detected
+        found = {et for _, et in EMERGENCY_TYPE_AUTOMATON.iter(message_lower)}
+
+        # Keep the declaration order of EMERGENCY_TYPES
+        return [et for et in EMERGENCY_TYPES if et in found]
+
+    def record_turn(self, role: str, message: str, timestamp_ns: int) -> None:
+        """Append a turn to history, dropping the oldest past HISTORY_LIMIT"""
+        self._hist_roles.append(role)
+        self._hist_msgs.append(message)
+        self._hist_ts.append(timestamp_ns)
+
+        if len(self._hist_msgs) > HISTORY_LIMIT:
+            del self._hist_roles[0]
+            del self._hist_msgs[0]
+            del self._hist_ts[0]
+
+    def format_options(self, option_ids: Sequence[int]) -> str:
+        """Numbered list of (at most 5) clarification options"""
+        return "".join(
+            f"{i + 1}. {self.category_display[idx]}\n"
+            for i, idx in enumerate(option_ids[:5])
+        )
 
     def generate_response(self, message: str) -> str:
         """Main intelligence system with multiple fallback layers"""
 
-        # Store in history
-        self.conversation_history.append(
-            {"role": "user", "message": message, "timestamp": datetime.now()}
-        )
+        # Store in history; one clock read per turn, reused for the reply
+        now_ns = time_ns()
+        self.record_turn("user", message, now_ns)
 
-        message_lower = message.lower()
+        # Lowercase and tokenize once; every layer below reuses these
+        message_lower, user_words = normalize_message(message)
+        is_emergency = self.detect_emergency_intent(message_lower)
 
         # LAYER 1: Handle clarification responses
-        if self.awaiting_clarification and self.clarification_options:
+        if self.awaiting_clarification and self.clarification_option_ids:
             # User is answering our question
-            for i, option in enumerate(self.clarification_options):
-                if str(i + 1) in message or option["category"].lower() in message_lower:
+            for i, idx in enumerate(self.clarification_option_ids):
+                if str(i + 1) in message or self.categories_lower[idx] in message_lower:
                     self.awaiting_clarification = False
-                    response = option["response"]
-                    self.last_topic = option["category"]
-                    self.clarification_options = []
-
-                    self.conversation_history.append(
-                        {
-                            "role": "assistant",
-                            "message": response,
-                            "timestamp": datetime.now(),
-                        }
-                    )
+                    response = self.responses[idx]
+                    self.last_topic = self.categories[idx]
+                    self.clarification_option_ids = array("I")
+
+                    self.record_turn("assistant", response, now_ns)
                     return response
 
         # LAYER 2: Basic intent detection
         # Greeting
-        if re.search(r"\b(hi|hello|hey|greetings|sup)\b", message_lower):
+        if _GREETING_RE.search(message_lower):
             if not self.user_name:
                 response = f"👋 Greetings, Space Agent! I'm {self.agent_name}, your AI mission support system.\n\nI can help with:\n🚨 Emergencies (oxygen, fire, hull breach, etc.)\n⚙️ System diagnostics\n🏥 Medical situations\n📡 Communication issues\n🧠 Psychological support\n\nWhat's your call sign (name)?"
             else:
                 response = f"Welcome back, Agent {self.user_name}! All systems ready. How can I assist?"
 
         # Farewell
-        elif re.search(r"\b(bye|goodbye|see you|exit|quit)\b", message_lower):
+        elif _FAREWELL_RE.search(message_lower):
             response = f"🛰️ Safe travels, Agent {self.user_name if self.user_name else ''}!\n\nMission Control standing by. We're here 24/7 when you need us.\n\nStay safe among the stars! 🌟"
 
         # Status check
-        elif re.search(
-            r"\b(status|report)\b", message_lower
-        ) and not self.detect_emergency_intent(message):
-            response = f"📊 SYSTEM STATUS - {datetime.now().strftime('%H:%M:%S UTC')}\n\n✓ AI: ONLINE\n✓ Knowledge Base: {len(self.dataset)} protocols\n✓ Comms: NOMINAL\n✓ Mission: {self.mission_status}\n\nReady to assist!"
+        elif _STATUS_RE.search(message_lower) and not is_emergency:
+            response = f"📊 SYSTEM STATUS - {datetime_from_ns(now_ns).strftime('%H:%M:%S UTC')}\n\n✓ AI: ONLINE\n✓ Knowledge Base: {len(self.dataset)} protocols\n✓ Comms: NOMINAL\n✓ Mission: {self.mission_status}\n\nReady to assist!"
 
         # Thank you
-        elif re.search(r"\b(thank|thanks)\b", message_lower):
+        elif _THANKS_RE.search(message_lower):
             response = (
                 "You're welcome, agent! Always here to help. What else do you need?"
             )
 
         # LAYER 3: Check for name introduction
         elif not self.user_name:
-            name_patterns = [
-                r"(?:name is|i'm|im|i am|call me)\s+(\w+)",
-                r"^(\w+)\s+(?:here|reporting)",
-                r"this is\s+(\w+)",
-            ]
             name_found = False
-            for pattern in name_patterns:
-                match = re.search(pattern, message_lower)
+            for pattern in _NAME_RES:
+                match = pattern.search(message_lower)
                 if match:
                     self.user_name = match.group(1).capitalize()
                     response = f"✅ Call sign registered: Agent {self.user_name}\n\nExcellent! I'm ready to assist you with any situation.\n\nWhat do you need help with?"
@@ -894,51 +1196,42 @@ What's specifically concerning you? Or want a distraction?""",
                 # Continue to emergency/query handling
                 pass
             else:
-                self.conversation_history.append(
-                    {
-                        "role": "assistant",
-                        "message": response,
-                        "timestamp": datetime.now(),
-                    }
-                )
+                self.record_turn("assistant", response, now_ns)
                 return response
 
         # LAYER 4: Emergency detection with fuzzy matching
-        is_emergency = self.detect_emergency_intent(message)
-
         if is_emergency:
             # Try to find what kind of emergency
-            matches = self.fuzzy_keyword_match(message)
+            matches = self.fuzzy_keyword_match(user_words)
 
             if matches and matches[0][1] >= 5:  # Good match found
-                best_match = self.dataset[matches[0][0]]
-                response = f"⚠️ EMERGENCY DETECTED - {best_match['category'].upper()}\n\n{best_match['response']}"
-                self.last_topic = best_match["category"]
+                best_idx = matches[0][0]
+                response = f"⚠️ EMERGENCY DETECTED - {self.category_names[best_idx]}\n\n{self.responses[best_idx]}"
+                self.last_topic = self.categories[best_idx]
 
             else:
                 # Emergency but unclear type - ask for clarification
-                emergency_types = self.extract_emergency_type(message)
+                emergency_types = self.extract_emergency_type(message_lower)
 
                 if emergency_types:
                     # Found potential types
-                    options = []
-                    for idx, entry in enumerate(self.dataset):
-                        for et in emergency_types:
-                            if et in entry["category"].lower() or any(
-                                et in kw for kw in entry["keywords"]
-                            ):
-                                if entry not in options:
-                                    options.append(entry)
+                    candidate_ids = set().union(
+                        *(self._entries_by_emergency_type[et] for et in emergency_types)
+                    )
+                    options = sorted(candidate_ids)
 
                     if len(options) == 1:
-                        response = f"⚠️ EMERGENCY DETECTED\n\n{options[0]['response']}"
-                        self.last_topic = options[0]["category"]
+                        response = (
+                            f"⚠️ EMERGENCY DETECTED\n\n{self.responses[options[0]]}"
+                        )
+                        self.last_topic = self.categories[options[0]]
                     elif len(options) > 1:
-                        response = "🚨 EMERGENCY DETECTED! Please specify:\n\n"
-                        self.clarification_options = options
-                        for i, opt in enumerate(options[:5]):
-                            response += f"{i + 1}. {opt['category'].upper().replace('_', ' ')}\n"
-                        response += "\nWhich emergency are you experiencing? (Type number or name)"
+                        self.clarification_option_ids = array("I", options)
+                        response = (
+                            "🚨 EMERGENCY DETECTED! Please specify:\n\n"
+                            + self.format_options(options)
+                            + "\nWhich emergency are you experiencing? (Type number or name)"
+                        )
                         self.awaiting_clarification = True
                     else:
                         response = self.general_emergency_response()
@@ -947,7 +1240,7 @@ What's specifically concerning you? Or want a distraction?""",
 
         # LAYER 5: Fuzzy keyword matching for queries
         else:
-            matches = self.fuzzy_keyword_match(message)
+            matches = self.fuzzy_keyword_match(user_words)
 
             if matches and matches[0][1] >= 3:  # Some match found
                 # Check if multiple good matches
@@ -955,90 +1248,56 @@ What's specifically concerning you? Or want a distraction?""",
 
                 if len(good_matches) > 1:
                     # Multiple possibilities - ask for clarification
-                    response = "I found multiple topics that might help:\n\n"
-                    self.clarification_options = []
-                    for i, (idx, score) in enumerate(good_matches[:5]):
-                        entry = self.dataset[idx]
-                        self.clarification_options.append(entry)
-                        response += (
-                            f"{i + 1}. {entry['category'].upper().replace('_', ' ')}\n"
-                        )
-                    response += "\nWhich one do you need? (Type number or name)"
+                    self.clarification_option_ids = array(
+                        "I", [idx for idx, _ in good_matches[:5]]
+                    )
+                    response = (
+                        "I found multiple topics that might help:\n\n"
+                        + self.format_options(self.clarification_option_ids)
+                        + "\nWhich one do you need? (Type number or name)"
+                    )
                     self.awaiting_clarification = True
 
                 else:
                     # Single best match
-                    best_match = self.dataset[matches[0][0]]
-                    response = best_match["response"]
-                    self.last_topic = best_match["category"]
+                    best_idx = matches[0][0]
+                    response = self.responses[best_idx]
+                    self.last_topic = self.categories[best_idx]
 
                     # Add follow-up questions if available
-                    if best_match.get("questions"):
-                        response += f"\n\n❓ To help further:\n"
-                        for q in best_match["questions"][:3]:
-                            response += f"• {q}\n"
+                    if self.questions[best_idx]:
+                        parts = [response, "\n\n❓ To help further:\n"]
+                        parts.extend(f"• {q}\n" for q in self.questions[best_idx][:3])
+                        response = "".join(parts)
 
             # LAYER 6: Contextual follow-up
-            elif self.last_topic and len(self.conversation_history) > 2:
+            elif self.last_topic and len(self._hist_msgs) > 2:
                 response = (
                     f"I'm still here to help with your {self.last_topic} situation.\n\n"
+                    "Could you provide more details? Or ask about:\n"
+                    "• Different emergency\n"
+                    "• System check\n"
+                    "• Space information\n"
+                    "• Psychological support"
                 )
-                response += "Could you provide more details? Or ask about:\n"
-                response += "• Different emergency\n"
-                response += "• System check\n"
-                response += "• Space information\n"
-                response += "• Psychological support"
 
             # LAYER 7: Ultimate fallback with helpful suggestions
             else:
-                response = "🤔 I want to help but need more details.\n\n"
-                response += "I'm trained on:\n\n"
-                response += "🚨 EMERGENCIES:\n"
-                response += "• Oxygen/air problems\n"
-                response += "• Fire\n"
-                response += "• Hull breach/pressure loss\n"
-                response += "• Radiation exposure\n"
-                response += "• Medical injuries\n\n"
-                response += "⚙️ SYSTEMS:\n"
-                response += "• Power/electrical\n"
-                response += "• Communication\n"
-                response += "• Navigation\n"
-                response += "• Life support\n\n"
-                response += "🌌 INFORMATION:\n"
-                response += "• Planets & space facts\n"
-                response += "• Mission data\n\n"
-                response += "🧠 SUPPORT:\n"
-                response += "• Stress & anxiety help\n\n"
-                response += "What do you need help with?"
+                response = FALLBACK_HELP
 
         # Store response
-        self.conversation_history.append(
-            {"role": "assistant", "message": response, "timestamp": datetime.now()}
-        )
+        self.record_turn("assistant", response, now_ns)
 
         return response
 
-    def general_emergency_response(self) -> str:
+    @staticmethod
+    def general_emergency_response() -> str:
         """Response when emergency detected but type unclear"""
-        return """🚨 EMERGENCY PROTOCOL ACTIVATED
-
-I detect an emergency but need to know the type. Please specify:
-
-1. 💨 OXYGEN/AIR - Leak, low O2, can't breathe
-2. 🔥 FIRE - Flames, smoke, burning
-3. 🕳️ HULL BREACH - Hole, depressurization, pressure loss
-4. ☢️ RADIATION - Solar flare, high dosimeter reading
-5. ⚡ POWER FAILURE - Electrical issues, battery dead
-6. 📡 COMMUNICATION LOSS - Can't reach Earth
-7. 🏥 MEDICAL - Injury, illness, unconscious crew
-8. 🧭 NAVIGATION - Lost, off course
-9. 🌬️ LIFE SUPPORT - CO2 high, temperature issues
-
-Type the NUMBER or NAME of your emergency for immediate protocol!"""
+        return GENERAL_EMERGENCY_RESPONSE
 
     def save_custom_dataset_template(
         self, filepath: str = "custom_dataset_template.json"
-    ):
+    ) -> None:
         """Save template for custom datasets"""
         template = [
             {
@@ -1063,7 +1322,7 @@ Type the NUMBER or NAME of your emergency for immediate protocol!"""
 
         try:
             with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(template, f, indent=2, ensure_ascii=False)
+                f.write(json.dumps(template, indent=2, ensure_ascii=False))
             print(f"✅ Template saved to {filepath}")
             print("\n📝 Format:")
             print("• keywords: List of words users might say")
@@ -1074,53 +1333,34 @@ Type the NUMBER or NAME of your emergency for immediate protocol!"""
         except Exception as e:
             print(f"❌ Error: {str(e)}")
 
-    def export_conversation(self, filepath: str):
+    def export_conversation(self, filepath: str) -> None:
         """Export chat history"""
         try:
-            history = []
-            for entry in self.conversation_history:
-                history.append(
-                    {
-                        "role": entry["role"],
-                        "message": entry["message"],
-                        "timestamp": entry["timestamp"].isoformat(),
-                    }
+            history = [
+                {
+                    "role": role,
+                    "message": message,
+                    "timestamp": datetime_from_ns(timestamp_ns).isoformat(),
+                }
+                for role, message, timestamp_ns in zip(
+                    self._hist_roles, self._hist_msgs, self._hist_ts
                 )
+            ]
 
             with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
+                # One write of the encoded document instead of one per token
+                f.write(json.dumps(history, indent=2, ensure_ascii=False))
 
             print(f"✅ Conversation saved to {filepath}")
         except Exception as e:
             print(f"❌ Error: {str(e)}")
 
-    def chat(self):
+    def chat(self) -> None:
         """Interactive chat interface"""
-        print("=" * 80)
-        print("🚀 SOS: SPACE AGENT - INTELLIGENT MISSION SUPPORT 🚀".center(80))
-        print("=" * 80)
-        print(f"\n{self.agent_name}: AI systems online...")
-        print(f"{self.agent_name}: {len(self.dataset)} emergency protocols loaded")
-        print(f"{self.agent_name}: Multi-layer intelligence active 🧠")
-        print(f"{self.agent_name}: Mission Control link established 🛰️\n")
-        print("=" * 80)
-        print("\n💡 INTELLIGENCE FEATURES:")
-        print("   ✓ Understands natural language (not just exact keywords)")
-        print("   ✓ Detects emergencies automatically")
-        print("   ✓ Asks clarifying questions when needed")
-        print("   ✓ Remembers conversation context")
-        print("   ✓ Fuzzy keyword matching")
-        print("\n📝 COMMANDS:")
-        print("   • 'export' - Save conversation")
-        print("   • 'template' - Get dataset format")
-        print("   • 'quit' - Exit")
-        print("\n💬 TRY SAYING:")
-        print('   • "Emergency! We\'re losing air!"')
-        print('   • "Something\'s burning"')
-        print('   • "I can\'t reach Earth"')
-        print('   • "Tell me about Mars"')
-        print('   • "I\'m feeling anxious"')
-        print("\n" + "=" * 80 + "\n")
+        sys.stdout.write(
+            CHAT_BANNER.format(agent=self.agent_name, protocols=len(self.dataset))
+        )
+        sys.stdout.flush()
 
         while True:
             try:
@@ -1132,19 +1372,20 @@ Type the NUMBER or NAME of your emergency for immediate protocol!"""
                     continue
 
                 # Special commands
-                if user_input.lower() == "export":
+                command = user_input.lower()
+                if command == "export":
                     filename = (
                         f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                     )
                     self.export_conversation(filename)
                     continue
 
-                if user_input.lower() == "template":
+                if command == "template":
                     self.save_custom_dataset_template()
                     continue
 
                 # Exit check
-                if user_input.lower() in ["quit", "exit"]:
+                if command in ("quit", "exit"):
                     print(f"\n{self.agent_name}: {self.generate_response('bye')}")
                     break
 
@@ -1168,7 +1409,7 @@ Type the NUMBER or NAME of your emergency for immediate protocol!"""
 # ============================================================================
 
 
-def run_demo():
+def run_demo() -> None:
     """Run demonstration of intelligent features"""
     print("\n🧪 INTELLIGENCE DEMO - See how the bot understands natural language\n")
 
@@ -1200,8 +1441,6 @@ def run_demo():
 # ============================================================================
 
 if __name__ == "__main__":
-    import sys
-
     print("\n🤖 SOS: Space Agent Chatbot Initializing...\n")
     print("Choose mode:")
     print("1. Interactive Chat (default)")